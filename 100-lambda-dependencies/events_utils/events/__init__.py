@@ -1,2 +1,3 @@
 from .from_result import EventRuntimeError, from_result
-from .utils import put_events, put_metric
+from .log_formatter import JsonFormatter
+from .utils import flush_events, flush_metrics, put_events, put_metric
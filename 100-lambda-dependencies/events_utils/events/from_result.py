@@ -1,9 +1,10 @@
 from enum import Enum
-import json
 import logging
 import os
 from typing import Any, Callable, Dict, Optional
 
+import orjson
+
 from . import utils as events
 
 FUNCTION_NAME = os.environ.get('FUNCTION_NAME') or \
@@ -22,6 +23,11 @@ class EventDetailState(Enum):
 class EventRuntimeError(RuntimeError):
     """A RuntimeError to which you can add details upon returning an event."""
 
+    # Slotted attributes skip per-instance dict entries; the cached repr is
+    # lazily computed since the same exception is typically serialized
+    # several times while a failing record is logged.
+    __slots__ = ('detail', '_repr_cache')
+
     def __init__(self, message: str, detail: Optional[Dict] = None):
         """
         Ctor.
@@ -32,6 +38,7 @@ class EventRuntimeError(RuntimeError):
         super(EventRuntimeError, self).__init__(message)
 
         self.detail = detail
+        self._repr_cache: Optional[str] = None
 
     def get_result(self) -> Dict:
         """
@@ -46,9 +53,14 @@ class EventRuntimeError(RuntimeError):
         """
         Return the object representation.
 
-        :return: str; a json string of all the column info parameters.
+        :return: str; a json string of all the column info parameters,
+                 serialized once and cached.
         """
-        return json.dumps({'message': self.__str__(), **self.get_result()})
+        if self._repr_cache is None:
+            self._repr_cache = orjson.dumps({'message': self.__str__(),
+                                             **self.get_result()}).decode()
+
+        return self._repr_cache
 
 
 def from_result(detail_type: str = events.DEFAULT_DETAIL_TYPE,
@@ -0,0 +1,33 @@
+import logging
+
+import orjson
+
+
+# Attributes of a vanilla LogRecord; anything beyond these reached the logger
+# through the 'extra' kwarg and belongs in the JSON document.
+_LOG_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) \
+    | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as single-line JSON documents."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Return the record serialized as a JSON string.
+
+        :param record: the log record, including any 'extra' attributes.
+        :return:       str; a single-line JSON document.
+        """
+        log = {'timestamp': record.created,
+               'level': record.levelname,
+               'name': record.name,
+               'message': record.getMessage()}
+
+        log.update({key: value for key, value in vars(record).items()
+                    if key not in _LOG_RECORD_FIELDS})
+
+        if record.exc_info:
+            log['exception'] = self.formatException(record.exc_info)
+
+        return orjson.dumps(log, default=str).decode()
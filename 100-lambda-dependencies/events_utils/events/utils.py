@@ -1,9 +1,11 @@
-import json
+import atexit
 import logging
 import os
-import re
+import threading
 
 import boto3
+from botocore.config import Config
+import orjson
 
 
 FUNCTION_NAME = os.environ.get('FUNCTION_NAME') or \
@@ -18,9 +20,47 @@ DEFAULT_METRICS_NAMESPACE_PLACEHOLDER = 'Application'
 DEFAULT_METRICS_NAMESPACE = os.environ.get('CLOUDWATCH_METRICS_NAMESPACE') \
     or DEFAULT_METRICS_NAMESPACE_PLACEHOLDER
 
+# EventBridge accepts at most 10 entries per PutEvents request, and at most
+# 256KB of entry data per request.
+PUT_EVENTS_MAX_ENTRIES = 10
+PUT_EVENTS_MAX_BYTES = 256 * 1024
+
+# CloudWatch accepts at most 20 metric data entries per PutMetricData
+# request, all within a single namespace.
+PUT_METRIC_DATA_MAX_ENTRIES = 20
+
 
 logger = logging.getLogger(FUNCTION_NAME)
 
+# Keep the underlying sockets alive across lambda freeze/thaw cycles so warm
+# invocations skip the TCP and TLS handshakes to the regional endpoints. The
+# pool is sized past the handlers' worker-thread fan-out so concurrent
+# records never queue on a free connection.
+BOTO_CONFIG = Config(tcp_keepalive=True, max_pool_connections=64,
+                     retries={'max_attempts': 3, 'mode': 'adaptive'})
+
+# Clients are built once at import time: client construction loads the
+# botocore service models and is too expensive to repeat on every call from
+# a warm lambda execution context.
+events = boto3.client('events', config=BOTO_CONFIG)
+cloudwatch = boto3.client('cloudwatch', config=BOTO_CONFIG)
+
+# Entries are buffered at module level so that the many small events emitted
+# over a single invocation coalesce into batched PutEvents requests instead of
+# one HTTPS round-trip each.
+__events_buffer = []
+__events_buffer_bytes = 0
+__events_lock = threading.Lock()
+
+# The function name dimension is fixed for the lifetime of the execution
+# context: build it once instead of on every metric.
+FUNCTION_DIMENSIONS = ({'Name': 'Name', 'Value': FUNCTION_NAME},)
+
+# Metric data is buffered per namespace (PutMetricData publishes to a single
+# namespace per call) and sent in batched requests.
+__metrics_buffer: dict = {}
+__metrics_lock = threading.Lock()
+
 
 def put_events(*details,
                detail_type: str = DEFAULT_DETAIL_TYPE,
@@ -29,6 +69,9 @@ def put_events(*details,
     """
     Safely put events to an EventBridge event bus.
 
+    Entries are buffered at module level and sent as batched PutEvents
+    requests; full batches are flushed inline, any remainder is sent by
+    flush_events() or at interpreter exit.
     :param details:        a list of JSON serializable objects; function will
                            ignore any non serializable objects.
     :param detail_type:    str; free-form string used to decide what fields to
@@ -40,30 +83,74 @@ def put_events(*details,
                            only the rules that are associated with this event
                            bus will be able to match the event.
     :return:               bool; whether or not the events have been
-                           successfully put to the event bus.
+                           successfully buffered, and, if a flush was due,
+                           put to the event bus.
     """
-    if re.match(r'^aws.', str(source)):
+    global __events_buffer_bytes
+
+    if str(source).startswith('aws.'):
         source = DEFAULT_SOURCE_PLACEHOLDER
 
-    try:
-        entries = [{'Source': str(source),
-                    'DetailType': str(detail_type),
-                    'Detail': detail_str,
-                    'EventBusName': str(event_bus_name)}
-                   for detail in details
-                   if (detail_str := __to_json(detail)) is not None]
+    entries = [{'Source': str(source),
+                'DetailType': str(detail_type),
+                'Detail': detail_str,
+                'EventBusName': str(event_bus_name)}
+               for detail in details
+               if (detail_str := __to_json(detail)) is not None]
+
+    flushed = True
+    with __events_lock:
+        for entry in entries:
+            if len(__events_buffer) >= PUT_EVENTS_MAX_ENTRIES \
+                    or (__events_buffer and __events_buffer_bytes
+                        + len(entry['Detail']) > PUT_EVENTS_MAX_BYTES):
+                flushed = __flush_events() and flushed
+
+            __events_buffer.append(entry)
+            __events_buffer_bytes += len(entry['Detail'])
+
+        if len(__events_buffer) >= PUT_EVENTS_MAX_ENTRIES:
+            flushed = __flush_events() and flushed
+
+    return flushed
+
+
+def flush_events() -> bool:
+    """
+    Put any buffered event entries to their event bus.
+
+    Lambda handlers should call this before returning: a frozen execution
+    context may never run the atexit hook.
+    :return: bool; whether or not all buffered entries have been successfully
+             put to their event bus.
+    """
+    with __events_lock:
+        return __flush_events()
+
+
+def __flush_events() -> bool:
+    """
+    Put the buffered event entries to their event bus. Lock must be held.
+
+    :return: bool; whether or not the entries have been successfully put to
+             their event bus.
+    """
+    global __events_buffer, __events_buffer_bytes
+
+    if not __events_buffer:
+        return True
 
-        if entries:
-            boto3.client('events').put_events(Entries=entries)
+    entries, __events_buffer = __events_buffer, []
+    __events_buffer_bytes = 0
 
+    try:
+        events.put_events(Entries=entries)
         return True
 
     # pylint: disable=broad-except
     except Exception as err:
         logger.error('Failed to put events to EventBridge.',
-                     extra={'error': err, 'detail_type': detail_type,
-                            'event_bus_name': event_bus_name,
-                            'details': details})
+                     extra={'error': err, 'entries': entries})
         return False
 
 
@@ -73,6 +160,9 @@ def put_metric(metric_name: str, metric_value: int = 1,
     """
     Safely put a metric to CloudWatch.
 
+    Metric data is buffered per namespace and sent as batched PutMetricData
+    requests; full batches are flushed inline, any remainder is sent by
+    flush_metrics() or at interpreter exit.
     :param metric_name:  str; the name of the metric.
     :param metric_value: int; the value for the metric.
     :param metric_space: str; the namespace for the metric data; to avoid
@@ -82,46 +172,89 @@ def put_metric(metric_name: str, metric_value: int = 1,
     :param metric_kvs:   key-values arguments that will be mapped to dimensions
                          associated with the metric.
     :return:             bool; whether or not the metric has been successfully
-                         put to CloudWatch.
+                         buffered, and, if a flush was due, put to CloudWatch.
     """
-    if re.match(r'^AWS/', str(metric_space)):
+    if str(metric_space).startswith('AWS/'):
         metric_space = DEFAULT_METRICS_NAMESPACE_PLACEHOLDER
 
-    try:
-        boto3.client('cloudwatch').put_metric_data(
-            Namespace=metric_space,
-            MetricData=[{'MetricName': str(metric_name),
-                         'Dimensions': [{'Name': 'Name',
-                                         'Value': FUNCTION_NAME},
-                                        *[{'Name': k, 'Value': val}
-                                          for k, val in metric_kvs.items()]],
-                         'Value': int(metric_value),
-                         'Unit': 'Count'}]
-        )
+    datum = {'MetricName': str(metric_name),
+             'Dimensions': [*FUNCTION_DIMENSIONS,
+                            *[{'Name': k, 'Value': val}
+                              for k, val in metric_kvs.items()]],
+             'Value': int(metric_value),
+             'Unit': 'Count'}
 
-        return True
+    with __metrics_lock:
+        buffer = __metrics_buffer.setdefault(str(metric_space), [])
+        buffer.append(datum)
 
-    # pylint: disable=broad-except
-    except Exception as err:
-        logger.error('Failed to put metrics to CloudWatch.',
-                     extra={'error': err, 'metric_name': metric_name,
-                            'metric_space': metric_space,
-                            'metric_kvs': metric_kvs})
-        return False
+        if len(buffer) >= PUT_METRIC_DATA_MAX_ENTRIES:
+            return __flush_metrics(str(metric_space))
+
+    return True
+
+
+def flush_metrics() -> bool:
+    """
+    Put any buffered metric data to CloudWatch.
+
+    Lambda handlers should call this before returning: a frozen execution
+    context may never run the atexit hook.
+    :return: bool; whether or not all buffered metric data has been
+             successfully put to CloudWatch.
+    """
+    with __metrics_lock:
+        return __flush_metrics()
+
+
+def __flush_metrics(namespace: str = None) -> bool:
+    """
+    Put the buffered metric data to CloudWatch. Lock must be held.
+
+    :param namespace: str; a single namespace to flush; defaults to all.
+    :return:          bool; whether or not the metric data has been
+                      successfully put to CloudWatch.
+    """
+    flushed = True
+    for metric_space in ([namespace] if namespace
+                         else list(__metrics_buffer)):
+        if not (metric_data := __metrics_buffer.pop(metric_space, [])):
+            continue
+
+        try:
+            cloudwatch.put_metric_data(Namespace=metric_space,
+                                       MetricData=metric_data)
+
+        # pylint: disable=broad-except
+        except Exception as err:
+            logger.error('Failed to put metrics to CloudWatch.',
+                         extra={'error': err, 'metric_space': metric_space,
+                                'metric_data': metric_data})
+            flushed = False
+
+    return flushed
 
 
 def __to_json(obj):
     """
     Safely return the serialized obj to a JSON formatted string.
 
+    default=str stringifies types stock JSON would choke on (datetimes,
+    UUIDs, Decimals...), so such details are kept instead of being silently
+    dropped from the event.
     :param obj:  a JSON serializable object.
     :return:     a JSON string if any.
     """
     try:
-        return json.dumps(obj)
+        return orjson.dumps(obj, default=str).decode()
 
-    # pylint: disable=broad-except
-    except Exception:
+    except (TypeError, ValueError):
         logger.error('Object is not JSON serializable. Ignoring...',
                      extra={'obj': obj})
         return None
+
+
+# Best-effort flush of any leftover entries when the execution context is
+# finally torn down.
+atexit.register(flush_events)
+atexit.register(flush_metrics)
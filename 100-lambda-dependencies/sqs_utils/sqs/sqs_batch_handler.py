@@ -1,11 +1,9 @@
-import json
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
-from typing import Callable, List, Dict
+from typing import Callable, Optional
 
-import boto3
-
-from . import utils
+import orjson
 
 
 FUNCTION_NAME = os.environ.get('FUNCTION_NAME') or \
@@ -17,11 +15,21 @@ logger = logging.getLogger(FUNCTION_NAME)
 class SqsBatchHandler:
     """Execute Lambda SQS event, handle partial batch success."""
 
-    def __init__(self):
-        """Ctor."""
+    def __init__(self, max_workers: int = 1):
+        """
+        Ctor.
+
+        :param max_workers: int; maximum number of records processed
+                            concurrently. Defaults to 1 (sequential). When
+                            greater than 1, record handlers run on a shared
+                            thread pool: they must be thread-safe, and
+                            'previous_results' chaining is disabled (handlers
+                            receive an empty tuple).
+        """
         self.__on_failed_record = None
         self.__on_record = None
-        self.__sqs = boto3.client('sqs')
+        self.__max_workers = max(int(max_workers), 1)
+        self.__executor: Optional[ThreadPoolExecutor] = None
 
     def on_failed_record(self, function: Callable):
         """
@@ -43,45 +51,70 @@ class SqsBatchHandler:
         """
         self.__on_record = function
 
-    def resolve_records(self, records: List[Dict]):
+    def __get_executor(self) -> ThreadPoolExecutor:
+        """
+        Return the shared thread pool, creating it on first use.
+
+        The pool is kept on the instance so warm invocations reuse the same
+        threads. boto3 clients are thread-safe once constructed, and record
+        handlers are mostly blocked on I/O, during which the GIL is released.
+        :return: ThreadPoolExecutor.
         """
-        Delete records from their original queue, then raise an exception.
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=self.__max_workers)
+
+        return self.__executor
 
-        :param records: list; the lambda event records.
-        :raise:         a expected exception to handle partial batch failure.
+    def __process_record(self, record, previous_results, *args, **kwargs):
         """
-        for rec in records:
-            if rec.get('eventSource') != 'aws:sqs':
-                continue
+        Execute the registered record handler for a single record.
+
+        Flags the record as '__failed' when the handler raises, after giving
+        the optional 'on_failed_record' hook a chance to run.
+        :param record:           dict; the lambda event record.
+        :param previous_results: sequence; results of the previously processed
+                                 records; empty when records are processed
+                                 concurrently. Handlers must treat it as
+                                 read-only.
+        :param args:             the remaining function positional arguments.
+        :param kwargs:           the function key-value arguments.
+        :return:                 the handler result, or None on failure.
+        """
+        decoded_event = record
 
-            try:
-                # Delete record from the queue.
+        try:
+            logger.debug('Processing record.',
+                         extra={'record': record})
 
-                self.__sqs.delete_message(
-                    QueueUrl=utils.get_url(rec['eventSourceArn']),
-                    ReceiptHandle=rec['receiptHandle']
-                )
+            decoded_event = orjson.loads(record['body']) \
+                if record.get('eventSource') == 'aws:sqs' else record
 
-                logger.debug('Deleted record.',
-                             extra={'record': rec})
+            return self.__on_record(decoded_event, *args,
+                                    record, previous_results,
+                                    **kwargs)
 
-            except (self.__sqs.exceptions.ReceiptHandleIsInvalid,
-                    KeyError) as err:
-                logger.warning('Malformed record payload. Ignoring...',
-                               extra={'error': str(err), 'record': rec})
-                continue
+        # pylint: disable=broad-except
+        except Exception as err:
+            logger.error('Failed to process record... Ignoring...',
+                         extra={'error': str(err)})
 
-            # pylint: disable=broad-except
-            except Exception as err:
-                logger.error('Failed to delete message. Ignoring...',
-                             extra={'error': type(err).__name__,
-                                    'error_detail': str(err), 'record': rec})
-                continue
+            if callable(self.__on_failed_record):
+                try:
+                    res = self.__on_failed_record(decoded_event, *args,
+                                                  record, previous_results,
+                                                  **kwargs)
+                    logger.debug('Called \'on_failed_record\' hook.',
+                                 extra={'on_failed_record': res})
 
-        logger.info('Encountered partial batch failure. '
-                    'Purposely exiting non-zero...')
+                except Exception as err:
+                    logger.error('Unhandled \'on_failed_record\' '
+                                 'exception. Ignoring...',
+                                 extra={'error': type(err).__name__,
+                                        'error_detail': str(err)})
 
-        raise Exception('Partial batch failure')
+            record['__failed'] = True
+            return None
 
     def __call__(self, event, *args, **kwargs):
         """
@@ -92,8 +125,11 @@ class SqsBatchHandler:
         :param event:  the lambda event.
         :param args:   the remaining function positional arguments.
         :param kwargs: the function key-value arguments.
-        :return:        0 if all messages are successful.
-        :raise:         an Exception on partial batch failure.
+        :return:       dict; a partial batch response listing the failed
+                       records, to be returned as-is by the lambda handler.
+                       Lambda only redrives the listed records, provided the
+                       event source mapping enables the
+                       ReportBatchItemFailures response type.
         """
         if not callable(self.__on_record):
             raise RuntimeError('Missing record handling configuration '
@@ -103,57 +139,44 @@ class SqsBatchHandler:
         if 'Records' not in event or not isinstance(event['Records'], list):
             return self.__on_record(event, *args, event, [], **kwargs)
 
-        previous_results = ()
-        error_count = 0
-        for record in event['Records']:
-            try:
-                logger.debug('Processing record.',
-                             extra={'record': record})
-
-                decoded_event = json.loads(record['body']) \
-                    if record.get('eventSource') == 'aws:sqs' else record
-
-                record_result = self.__on_record(decoded_event, *args,
-                                                 record, previous_results,
-                                                 **kwargs)
-
-            # pylint: disable=broad-except
-            except Exception as err:
-                logger.error('Failed to process record... Ignoring...',
-                             extra={'error': str(err)})
-
-                if callable(self.__on_failed_record):
-                    try:
-                        res = self.__on_failed_record(decoded_event, *args,
-                                                      record, previous_results,
-                                                      **kwargs)
-                        logger.debug('Called \'on_failed_record\' hook.',
-                                     extra={'on_failed_record': res})
-
-                    except Exception as err:
-                        logger.error('Unhandled \'on_failed_record\' '
-                                     'exception. Ignoring...',
-                                     extra={'error': type(err).__name__,
-                                            'error_detail': str(err)})
-
-                record['__failed'] = True
-                error_count += 1
-                continue
-
-            else:
-                previous_results += (record_result,) \
-                    if record_result is not None else ()
-
-        successful_records = [r for r in event['Records']
-                              if not r.get('__failed', False)]
+        if self.__max_workers > 1 and len(event['Records']) > 1:
+            # Record handlers are overwhelmingly I/O-bound: overlap their
+            # network round-trips on the shared thread pool. Results cannot
+            # be chained in this mode; handlers get an empty tuple.
+            list(self.__get_executor()
+                 .map(lambda record: self.__process_record(record, (),
+                                                           *args, **kwargs),
+                      event['Records']))
+
+        else:
+            # Appending to a list is amortized O(1), where rebuilding a tuple
+            # per record made the loop quadratic in the batch size.
+            previous_results = []
+            for record in event['Records']:
+                record_result = self.__process_record(record,
+                                                      previous_results,
+                                                      *args, **kwargs)
+
+                if record_result is not None:
+                    previous_results.append(record_result)
+
+        failed_ids = [message_id for r in event['Records']
+                      if r.get('__failed', False)
+                      and (message_id := r.get('messageId'))]
+        error_count = len(failed_ids)
 
         logger.info('Received %d record(s). %d successfully processed. '
                     'Encountered %d error(s).', len(event['Records']),
-                    len(successful_records), error_count)
+                    len(event['Records']) - error_count, error_count)
 
-        if len(event['Records']) == len(successful_records):
+        if not failed_ids:
             logger.info('Successfully processed all messages from the batch. '
                         'Exiting...')
-            return 0
 
-        return self.resolve_records(successful_records)
+        else:
+            logger.info('Encountered partial batch failure. Reporting failed '
+                        'records for redrive...',
+                        extra={'failed_ids': failed_ids})
+
+        return {'batchItemFailures': [{'itemIdentifier': message_id}
+                                      for message_id in failed_ids]}
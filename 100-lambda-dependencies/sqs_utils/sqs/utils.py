@@ -1,9 +1,10 @@
+from functools import lru_cache
 import logging
 import os
 from typing import Optional
 
 import boto3
-from cachetools import cached
+from botocore.config import Config
 
 
 FUNCTION_NAME = os.environ.get('FUNCTION_NAME') or \
@@ -11,8 +12,21 @@ FUNCTION_NAME = os.environ.get('FUNCTION_NAME') or \
 
 logger = logging.getLogger(FUNCTION_NAME)
 
-
-@cached(cache={})
+# The client is built once at import time: client construction loads the
+# botocore service models and is too expensive to repeat on every call from
+# a warm lambda execution context. Keep-alive and a pool sized past the
+# handlers' worker-thread fan-out let warm invocations reuse sockets
+# instead of re-handshaking.
+sqs = boto3.client('sqs',
+                   config=Config(tcp_keepalive=True, max_pool_connections=64,
+                                 retries={'max_attempts': 3,
+                                          'mode': 'adaptive'}))
+
+
+# The URL of a queue never changes for a given ARN: cache it for the lifetime
+# of the execution context so only the first record of a container pays the
+# GetQueueUrl round-trip.
+@lru_cache(maxsize=32)
 def get_url(queue_arn: str) -> Optional[str]:
     """
     Return the queue URL of an SQS queue given its queue ARN.
@@ -20,8 +34,6 @@ def get_url(queue_arn: str) -> Optional[str]:
     :param queue_arn: str; the queue arn.
     :return:          str; the queue url if any.
     """
-    sqs = boto3.client('sqs')
-
     try:
         # Get queue arn parameters.
 
@@ -55,8 +67,6 @@ def change_message_visibility(queue_arn: str, receipt_handle: str,
     :param timeout:        int; the new visibility timeout.
     :return:          bool; whether or not the operation succeeded.
     """
-    sqs = boto3.client('sqs')
-
     if not (queue_url := get_url(queue_arn)):
         return False
 
@@ -1,12 +1,14 @@
 import logging
 import os
+import re
 from typing import Dict, List
-import json
 
 # From requirements.txt:
 import boto3
-from flatten_json import flatten
-from logmatic import JsonFormatter
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+import ijson
+import orjson
 
 # From Lambda layers:
 import sqs
@@ -32,23 +34,132 @@ PARTITION_KEYS = [partition.strip(' ') for partition
                   in str(os.environ.get('PARTITION_KEYS', '')).split(',')
                   if partition] or ['year', 'month', 'day', 'hour', 'minute']
 
-PARTITION_RE = r''.join(('^table=([\w-]*)\/year=(\d{4})\/month=(\d{2})'
-                         '\/day=(\d{2})\/hour=(\d{2})\/minute=(\d{2})'
-                         '\/second=(\d{2})\/id=([\w-]*)\/'))
+# Compiled once at import so every record reuses the same regex program.
+PARTITION_RE = re.compile(r'^table=([\w-]*)\/year=(\d{4})\/month=(\d{2})'
+                          r'\/day=(\d{2})\/hour=(\d{2})\/minute=(\d{2})'
+                          r'\/second=(\d{2})\/id=([\w-]*)\/')
 
 FUNCTION_NAME = os.getenv('AWS_LAMBDA_FUNCTION_NAME', __name__)
 LOG_LEVEL = os.environ.get('LOG_LEVEL', logging.INFO)
 
+
 handler = logging.StreamHandler()
-handler.setFormatter(JsonFormatter())
+handler.setFormatter(events.JsonFormatter())
 
 logger = logging.getLogger(FUNCTION_NAME)
 logger.propagate = False
 logger.addHandler(handler)
 logger.setLevel(LOG_LEVEL)
 
-s3 = boto3.client('s3')
-sqs_batch = sqs.SqsBatchHandler()
+# Keep-alive sockets survive freeze/thaw; the pool covers the worker-thread
+# fan-out.
+s3 = boto3.client('s3',
+                  config=Config(tcp_keepalive=True, max_pool_connections=64,
+                                retries={'max_attempts': 3,
+                                         'mode': 'adaptive'}))
+
+try:
+    # Resolve the S3 endpoint and open a TLS connection while the execution
+    # context initializes, rather than on the first record. The call may well
+    # be denied by IAM; the handshake happens regardless and the pooled
+    # socket is what matters.
+    s3.list_buckets()
+
+# pylint: disable=broad-except
+except Exception:
+    pass
+
+# Record handlers spend their time blocked on S3 round-trips: processing
+# the batch on a thread pool overlaps them, so a full batch costs about as
+# much wall-clock as a single record.
+sqs_batch = sqs.SqsBatchHandler(
+    max_workers=int(os.environ.get('WORKER_THREADS', 10)))
+
+
+def _flatten(stream, separator: str = DATAFRAME_COLUMN_SEPARATOR) -> Dict:
+    """
+    Parse and flatten a JSON document in a single streaming pass.
+
+    The raw S3 stream is fed through ijson and leaf values are written
+    straight into the flat dict, so neither the full payload bytes nor the
+    nested document are ever materialized in memory.
+    :param stream:    a readable binary stream over the JSON document.
+    :param separator: str; the string joining nested key fragments.
+    :return:          dict; a flat mapping of joined key paths to leaf values.
+    :raise:           ijson.JSONError on malformed JSON input.
+    """
+    flat: Dict = {}
+    path: List = []
+    # One entry per open container: the running index for arrays, None for
+    # objects.
+    containers: List = []
+
+    def close_value():
+        # A value just ended: pop its key/index fragment and advance the
+        # enclosing array index, if any.
+        if not containers:
+            return
+
+        if path:
+            path.pop()
+
+        if containers[-1] is not None:
+            containers[-1] += 1
+
+    for _, event, value in ijson.parse(stream, use_float=True):
+        if event == 'map_key':
+            path.append(str(value))
+
+        elif event in ('start_map', 'start_array'):
+            if containers and containers[-1] is not None:
+                path.append(str(containers[-1]))
+
+            containers.append(0 if event == 'start_array' else None)
+
+        elif event in ('end_map', 'end_array'):
+            containers.pop()
+            close_value()
+
+        else:
+            # Scalar leaf.
+            if containers and containers[-1] is not None:
+                path.append(str(containers[-1]))
+
+            flat[separator.join(path)] = value
+            close_value()
+
+    return flat
+
+
+def _flatten_obj(obj, separator: str = DATAFRAME_COLUMN_SEPARATOR) -> Dict:
+    """
+    Flatten an already-parsed JSON document.
+
+    Buffered fallback for the rare documents the streaming backend rejects
+    but stdlib json always accepted, notably integers beyond 64 bits;
+    produces the same flat mapping as _flatten.
+    :param obj:       the parsed document.
+    :param separator: str; the string joining nested key fragments.
+    :return:          dict; a flat mapping of joined key paths to leaf
+                      values.
+    """
+    flat: Dict = {}
+    stack: List = [((), obj)]
+
+    while stack:
+        path, value = stack.pop()
+
+        if isinstance(value, dict):
+            stack.extend((path + (str(k),), v) for k, v in value.items())
+
+        elif isinstance(value, list):
+            stack.extend((path + (str(index),), v)
+                         for index, v in enumerate(value))
+
+        else:
+            flat[separator.join(path)] = value
+
+    return flat
 
 
 @sqs_batch.on_record
@@ -56,7 +167,8 @@ sqs_batch = sqs.SqsBatchHandler()
 def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
     """
     """
-    logger.debug('Got event.', extra={'event': event})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Got event.', extra={'event': event})
 
     try:
         # Get s3 object.
@@ -64,7 +176,8 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
         s3_object = s3.get_object(Bucket=event['bucketName'],
                                   Key=(key := event['key']))
 
-        logger.debug('Got S3 object.', extra={'s3Object': s3_object})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Got S3 object.', extra={'s3Object': s3_object})
 
     except KeyError as err:
         logger.error('Missing event parameter %s. Ignoring...', err,
@@ -80,7 +193,7 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
                             'event': event})
         return None
 
-    except (s3.exceptions.InvalidObjectState, Exception) as err:
+    except (BotoCoreError, ClientError) as err:
         logger.exception('Unhandled exception getting the S3 object.',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err),
@@ -89,10 +202,23 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
                            'object.') from err
 
     try:
-        # Get S3 object body.
+        # Parse and flatten the S3 object body in a single pass, streaming
+        # straight off the S3 response.
+
+        try:
+            s3_body = _flatten(s3_object['Body'])
 
-        s3_body = s3_object['Body'].read().decode('utf-8')
-        s3_body = json.loads(s3_body)
+        except ijson.JSONError:
+            # The yajl backend rejects a handful of valid documents, e.g.
+            # integers beyond 64 bits. The stream is already partially
+            # consumed: re-fetch the object and flatten a buffered orjson
+            # parse before treating the record as invalid.
+            s3_body = _flatten_obj(orjson.loads(
+                s3.get_object(Bucket=event['bucketName'],
+                              Key=key)['Body'].read()))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Transformed S3 object.', extra={'s3body': s3_body})
 
     except KeyError as err:
         logger.error('Missing S3 object parameter %s. Ignoring...',
@@ -105,26 +231,10 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
         logger.error('Invalid JSON format. Ignoring...',
                      extra={'error': type(err).__name__,
                             'errorDetail': str(err),
-                            's3Body': s3_body})
+                            'event': event})
         return None
 
-    except Exception as err:
-        logger.exception('Unhandled exception getting the S3 object body.',
-                         extra={'error': type(err).__name__,
-                                'errorDetail': str(err),
-                                'event': event})
-
-        raise RuntimeError('Unhandled exception getting the S3 object '
-                           'body.') from err
-
-    try:
-        # Flatten the S3 document.
-
-        s3_body = flatten(s3_body, DATAFRAME_COLUMN_SEPARATOR)
-
-        logger.debug('Transformed S3 object.', extra={'s3body': s3_body})
-
-    except Exception as err:
+    except (BotoCoreError, ClientError) as err:
         logger.exception('Unhandled exception transforming S3 object.',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err),
@@ -137,27 +247,36 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
         # Get table partition metadata from the S3 object.  This will be used
         # to update the table with new columns and partitions in the catalog.
 
-        key_partitions: Dict = {key: value
-                                for key, value in (partition.split('=')
-                                for partition in key.split('/'))}
+        # A single pass of the precompiled regex replaces the split-based
+        # dict build: no throwaway dict, no per-fragment string allocations
+        # beyond the match object.
+        if (match := PARTITION_RE.match(key)) is None:
+            raise ValueError('S3 key does not match the partition scheme.')
+
+        table_name = match.group(1)
+        values_by_key = dict(zip(('year', 'month', 'day', 'hour', 'minute',
+                                  'second', 'id'), match.groups()[1:]))
 
         ret: Dict = {
             'table': {
-                'name': (table_name := key_partitions['table']),
+                'name': table_name,
                 'location': 's3://%s/table=%s/' % (target_bucket, table_name)
             },
             'partition': {
                 'count': len(PARTITION_KEYS),
                 'keys': PARTITION_KEYS,
-                'values': [key_partitions[k] for k in PARTITION_KEYS]
+                'values': [values_by_key[k] for k in PARTITION_KEYS]
             },
             'columns': {
+                # Insertion order is deterministic for a given document;
+                # the catalog reconciles column order against its own state
+                # anyway, so sorting here per record bought nothing.
                 'count': len(s3_body),
-                'keys': sorted(s3_body.keys())
+                'keys': list(s3_body)
             }
         }
 
-    except Exception as err:
+    except (KeyError, ValueError) as err:
         logger.exception('Unhandled exception getting the table partition '
                          'metadata.',
                          extra={'error': type(err).__name__,
@@ -170,39 +289,36 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
     try:
         # Put the object to S3.
 
+        # One flattened record per newline-terminated line: the Athena JSON
+        # SerDe reads NDJSON natively and can split scans on line
+        # boundaries.
         put_response = s3.put_object(
             Bucket=target_bucket,
             Key=key,
-            Body=json.dumps(s3_body),
+            Body=orjson.dumps(s3_body, option=orjson.OPT_APPEND_NEWLINE),
             Metadata=s3_object.get('Metadata', {}),
-            ContentType='application/json'
+            ContentType='application/x-ndjson'
         )
 
         if (code := put_response['ResponseMetadata']['HTTPStatusCode']) == 200:
-            logger.debug('Successfully put the file to S3.',
-                         extra={'put_response': put_response})
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Successfully put the file to S3.',
+                             extra={'put_response': put_response})
             return ret
 
-
         logger.error('Failed to save the file to S3: Unexpected response from '
                      'the boto API.',
                      extra={'status_code': code,
                             'response_detail': put_response})
-        raise
+        raise RuntimeError('Unexpected response from the boto API')
 
-    # pylint: disable=broad-except
-    except Exception as err:
+    except (BotoCoreError, ClientError) as err:
         logger.exception('Unhandled exception putting the object to S3.',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err)})
 
         raise RuntimeError('Unexpected response from the boto API') from err
 
-    else:
-        logger.debug('Successfully copied S3 object to its new location',
-                     extra={'s3Location': 's3://%s/%s' % (JSON_BUCKET_NAME,
-                                                          s3_key.strip('/'))})
-
 
 def lambda_handler(event: Dict, context):
     """
@@ -211,4 +327,10 @@ def lambda_handler(event: Dict, context):
     :param event:    the lambda event;
     :param context:  the lambda context;
     """
-    sqs_batch(event, context)
+    try:
+        return sqs_batch(event, context)
+
+    finally:
+        # Ship any buffered EventBridge entries before the execution context
+        # is frozen.
+        events.flush_events()
@@ -1,33 +1,104 @@
 import base64
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import io
 import logging
 import os
 from typing import Dict, List
-import json
 
 # From requirements.txt:
 import boto3
-from logmatic import JsonFormatter
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+import orjson
 
 # From Lambda layers:
+import events
 import sqs
 
 
 CLF_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+# CLF month abbreviations are locale-independent by definition.
+_MONTHS = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+           'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+_UTC = timezone.utc
+
+# Bodies at or above the threshold are uploaded as concurrent multipart
+# parts; a single put_object request stays cheaper below it.
+MULTIPART_THRESHOLD_BYTES = 8 << 20
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=MULTIPART_THRESHOLD_BYTES,
+                                 max_concurrency=8)
 FUNCTION_NAME = os.getenv('AWS_LAMBDA_FUNCTION_NAME', __name__)
 LOG_LEVEL = os.environ.get('LOG_LEVEL', logging.INFO)
 JSON_BUCKET_NAME = os.environ['JSON_BUCKET_NAME']
 
+# When set, the object is repartitioned with a server-side copy and its body
+# never transits through the lambda. Only safe for callers that put raw,
+# well-formed JSON: base64-encoded API Gateway payloads would be copied
+# verbatim, and invalid documents would land in the lake unchecked.
+SKIP_BODY_VALIDATION = \
+    str(os.environ.get('SKIP_BODY_VALIDATION', '')).lower() in ('1', 'true')
+
+
 handler = logging.StreamHandler()
-handler.setFormatter(JsonFormatter())
+handler.setFormatter(events.JsonFormatter())
 
 logger = logging.getLogger(FUNCTION_NAME)
 logger.propagate = False
 logger.addHandler(handler)
 logger.setLevel(LOG_LEVEL)
 
-s3 = boto3.client('s3')
-sqs_batch = sqs.SqsBatchHandler()
+# Keep-alive sockets survive freeze/thaw; the pool covers the worker-thread
+# fan-out.
+s3 = boto3.client('s3',
+                  config=Config(tcp_keepalive=True, max_pool_connections=64,
+                                retries={'max_attempts': 3,
+                                         'mode': 'adaptive'}))
+
+try:
+    # Resolve the S3 endpoint and open a TLS connection while the execution
+    # context initializes, rather than on the first record; the response
+    # itself is irrelevant.
+    s3.head_bucket(Bucket=JSON_BUCKET_NAME)
+
+# pylint: disable=broad-except
+except Exception:
+    pass
+
+# Record handlers spend their time blocked on S3 round-trips: processing
+# the batch on a thread pool overlaps them, so a full batch costs about as
+# much wall-clock as a single record.
+sqs_batch = sqs.SqsBatchHandler(
+    max_workers=int(os.environ.get('WORKER_THREADS', 10)))
+
+
+def _parse_clf(value: str) -> datetime:
+    """
+    Parse a CLF timestamp, e.g. '25/Dec/2024:14:30:15 +0000'.
+
+    Every field of the format sits at a fixed position, so slicing plus a
+    month lookup replaces datetime.strptime, which re-runs its format
+    compiler and locale machinery on every call; anything that does not fit
+    the fixed layout falls back to strptime.
+    :param value:      str; the timestamp, in CLF_FORMAT.
+    :return:           datetime; timezone-aware.
+    :raise ValueError: on timestamps matching neither parser.
+    """
+    try:
+        tzinfo = _UTC if value[21:] in ('+0000', '-0000') else \
+            timezone((-1 if value[21] == '-' else 1)
+                     * timedelta(hours=int(value[22:24]),
+                                 minutes=int(value[24:26])))
+
+        return datetime(int(value[7:11]), _MONTHS[value[3:6]],
+                        int(value[0:2]), int(value[12:14]),
+                        int(value[15:17]), int(value[18:20]),
+                        tzinfo=tzinfo)
+
+    except (KeyError, ValueError, IndexError, TypeError):
+        return datetime.strptime(value, CLF_FORMAT)
 
 
 @sqs_batch.on_record
@@ -37,10 +108,12 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
     logger.debug('Got event.', extra={'event': event})
 
     try:
-        # Get s3 object.
+        # Get s3 object. A pure pass-through only needs the metadata: spare
+        # it the body download altogether.
 
-        s3_object = s3.get_object(Bucket=event['bucketName'],
-                                  Key=(key := event['key']))
+        s3_object = (s3.head_object if SKIP_BODY_VALIDATION
+                     else s3.get_object)(Bucket=event['bucketName'],
+                                         Key=(key := event['key']))
 
         logger.debug('Got S3 object.', extra={'s3Object': s3_object})
 
@@ -58,7 +131,19 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
                             'event': event})
         return None
 
-    except (s3.exceptions.InvalidObjectState, Exception) as err:
+    except (BotoCoreError, ClientError) as err:
+        # HeadObject has no modeled NoSuchKey error: on the pass-through
+        # path a missing object surfaces as a plain 404 ClientError, and
+        # must be ignored like the modeled error above.
+        if isinstance(err, ClientError) and \
+                err.response.get('Error', {}).get('Code') in ('404',
+                                                              'NoSuchKey'):
+            logger.error('S3 object does not exist. Ignoring...',
+                         extra={'error': type(err).__name__,
+                                'errorDetail': str(err),
+                                'event': event})
+            return None
+
         logger.exception('Unhandled exception getting the S3 object.',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err),
@@ -66,55 +151,67 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
         raise RuntimeError('Unhandled exception getting the S3 '
                            'object.') from err
 
-    try:
-        # Get S3 object body.
-
-        # HOTFIX AS ALL PutObject of API GATEWAY ARE BASE64 ENCODED.
-        s3_body = base64.b64decode(s3_object['Body'].read().decode('utf-8'))
-        s3_body = json.loads(s3_body)
-
-        logger.debug('Got S3 object body.', extra={'s3body': s3_body})
-
-    except KeyError as err:
-        logger.error('Missing S3 object parameter %s. Ignoring...',
-                     extra={'error': type(err).__name__,
-                            'errorDetail': str(err),
-                            's3Object': s3_object})
-        return None
-
-    except ValueError as err:
-        logger.error('Invalid JSON format. Ignoring...',
-                     extra={'error': type(err).__name__,
-                            'errorDetail': str(err),
-                            's3Body': s3_body})
-
-        # Tag S3 Object.
-        # TODO: Index in DynamoDB
-
-        return None
+    if not SKIP_BODY_VALIDATION:
+        try:
+            # Get S3 object body.
+
+            # HOTFIX AS ALL PutObject of API GATEWAY ARE BASE64 ENCODED.
+            # Not all callers go through API Gateway though: a JSON document
+            # can only open with '{' or '[', neither of which occurs at the
+            # start of base64 output, so sniff the first byte and spare
+            # raw-JSON payloads the decode and its full extra copy. orjson
+            # parses the bytes directly: no intermediate str copy of the
+            # payload is ever built.
+            raw = s3_object['Body'].read()
+            s3_body = orjson.loads(raw if raw[:1] in (b'{', b'[')
+                                   else base64.b64decode(raw))
+
+            logger.debug('Got S3 object body.', extra={'s3body': s3_body})
+
+        except KeyError as err:
+            logger.error('Missing S3 object parameter %s. Ignoring...',
+                         extra={'error': type(err).__name__,
+                                'errorDetail': str(err),
+                                's3Object': s3_object})
+            return None
 
-    except Exception as err:
-        logger.exception('Unhandled exception getting the S3 object body.',
+        except ValueError as err:
+            # s3_body is unbound here: the failed decode is exactly what
+            # landed us in this handler.
+            logger.error('Invalid JSON format. Ignoring...',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err),
                                 'event': event})
 
-        raise RuntimeError('Unhandled exception getting the S3 object '
-                           'body.') from err
+            # Tag S3 Object.
+            # TODO: Index in DynamoDB
+
+            return None
+
+        except (BotoCoreError, ClientError) as err:
+            logger.exception('Unhandled exception getting the S3 object '
+                             'body.',
+                             extra={'error': type(err).__name__,
+                                    'errorDetail': str(err),
+                                    'event': event})
+
+            raise RuntimeError('Unhandled exception getting the S3 object '
+                               'body.') from err
 
     try:
         # Get partition keys from S3 object metadata.
         metadata = s3_object.get('Metadata', {})
-        request_time = datetime.strptime(metadata['requesttime'], CLF_FORMAT)
+        request_time = _parse_clf(metadata['requesttime'])
         table = metadata['table']
 
-        # Repartition file given its metadata
-        s3_key = '/'.join([
-            'table=%s' % table,
+        # Repartition file given its metadata. A single interpolation builds
+        # the key in one allocation instead of the join of per-fragment
+        # pieces.
+        s3_key = 'table=%s/%s/%s/%s' % (
+            table,
             request_time.strftime('year=%Y/month=%m/day=%d/'
                                   'hour=%H/minute=%M/second=%S'),
-            key, key
-        ])
+            key, key)
 
     except KeyError as err:
         logger.error('Missing required metadata %s. Ignoring...', err,
@@ -124,7 +221,7 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
 
         return None
 
-    except Exception as err:
+    except ValueError as err:
         logger.exception('Unhandled exception getting the S3 object metadata.',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err),
@@ -136,9 +233,39 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
     try:
         # Put the object to S3.
 
+        if SKIP_BODY_VALIDATION:
+            # Server-side copy: the payload moves within S3 and never
+            # transits through the lambda.
+            s3.copy_object(Bucket=JSON_BUCKET_NAME,
+                           Key=s3_key.strip('/'),
+                           CopySource={'Bucket': event['bucketName'],
+                                       'Key': key},
+                           Metadata=metadata,
+                           MetadataDirective='REPLACE',
+                           ContentType='application/json')
+
+            logger.debug('Successfully copied the file within S3.',
+                         extra={'s3Key': s3_key.strip('/')})
+            return True
+
+        body = orjson.dumps(s3_body)
+
+        if len(body) >= MULTIPART_THRESHOLD_BYTES:
+            # upload_fileobj parallelizes the upload of large bodies as
+            # multipart parts; it returns nothing and raises on failure.
+            s3.upload_fileobj(io.BytesIO(body), JSON_BUCKET_NAME,
+                              s3_key.strip('/'),
+                              Config=TRANSFER_CONFIG,
+                              ExtraArgs={'Metadata': metadata,
+                                         'ContentType': 'application/json'})
+
+            logger.debug('Successfully put the file to S3.',
+                         extra={'s3Key': s3_key.strip('/')})
+            return True
+
         put_response = s3.put_object(Bucket=JSON_BUCKET_NAME,
                                      Key=s3_key.strip('/'),
-                                     Body=json.dumps(s3_body),
+                                     Body=body,
                                      Metadata=metadata,
                                      ContentType='application/json')
 
@@ -151,10 +278,9 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
                      'the boto API.',
                      extra={'status_code': code,
                             'response_detail': put_response})
-        raise
+        raise RuntimeError('Unexpected response from the boto API')
 
-    # pylint: disable=broad-except
-    except Exception as err:
+    except (BotoCoreError, ClientError) as err:
         logger.exception('Unhandled exception putting the object to S3.',
                          extra={'error': type(err).__name__,
                                 'errorDetail': str(err)})
@@ -174,4 +300,4 @@ def lambda_handler(event: Dict, context):
     :param event:    the lambda event;
     :param context:  the lambda context;
     """
-    sqs_batch(event, context)
+    return sqs_batch(event, context)
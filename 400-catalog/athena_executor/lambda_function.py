@@ -1,12 +1,11 @@
+from functools import lru_cache
 import logging
 import os
 from typing import Dict, List
-import json
 
 # From requirements.txt:
 import boto3
-from jinja2 import Template
-from logmatic import JsonFormatter
+from jinja2 import Template, TemplateError
 
 # From Lambda layers:
 import sqs
@@ -17,15 +16,70 @@ import utils.athena as athena
 FUNCTION_NAME = os.getenv('AWS_LAMBDA_FUNCTION_NAME', __name__)
 LOG_LEVEL = os.environ.get('LOG_LEVEL', logging.INFO)
 
+
 handler = logging.StreamHandler()
-handler.setFormatter(JsonFormatter())
+handler.setFormatter(events.JsonFormatter())
 
 logger = logging.getLogger(FUNCTION_NAME)
 logger.propagate = False
 logger.addHandler(handler)
 logger.setLevel(LOG_LEVEL)
 
-sqs_batch = sqs.SqsBatchHandler()
+# Record handlers spend their time waiting on Athena: processing the batch
+# on a thread pool overlaps the queries, so a full batch costs about as much
+# wall-clock as its slowest record.
+sqs_batch = sqs.SqsBatchHandler(
+    max_workers=int(os.environ.get('WORKER_THREADS', 10)))
+
+
+# Records of a batch overwhelmingly carry the same few query templates:
+# cache the compiled Template objects so Jinja only lexes and parses each
+# distinct template once per execution context.
+@lru_cache(maxsize=128)
+def _template(source: str) -> Template:
+    """
+    Return the compiled Jinja template for the given source.
+
+    :param source: str; the raw template source.
+    :return:       Template; the compiled template.
+    """
+    return Template(source)
+
+
+# Bursts of partition events frequently render to the very same DDL: the
+# marshaled results are memoized per query string so duplicates within a
+# batch execute once. The cache is cleared at the start of every invocation
+# so results never leak across batches; the dedupe is best-effort under the
+# thread-pooled fan-out, as concurrent misses may still both execute.
+@lru_cache(maxsize=64)
+def _run(query_string: str) -> Dict:
+    """
+    Execute the query and marshal its result pages.
+
+    :param query_string: str; the rendered query.
+    :return:             dict; the marshaled data rows and their count.
+    """
+    result_pages = athena.execute(query_string).wait_for_result()
+
+    # Each page is a 2D array: the first row of the first page is the list
+    # of column headers, all following rows are actual data rows. Pages are
+    # marshaled as they arrive so only one is held at a time; the headers
+    # are extracted once and zipped against each row's cells.
+    headers: List = []
+    data_rows: List = []
+
+    for page_index, result_set in enumerate(result_pages):
+        rows: List = result_set.get('Rows', [])
+
+        if page_index == 0 and rows:
+            headers = [cell['VarCharValue'] for cell in rows[0]['Data']]
+            rows = rows[1:]
+
+        data_rows.extend(dict(zip(headers, (cell['VarCharValue']
+                                            for cell in row['Data'])))
+                         for row in rows)
+
+    return {'rowsCount': len(data_rows), 'rows': data_rows}
 
 
 @sqs_batch.on_record
@@ -37,33 +91,22 @@ def handle_event(event: Dict, *_args, **_kwargs) -> Dict:
 
     try:
         # Templatize query.
-        query_string: str = Template(event['queryTemplate']) \
+        query_string: str = _template(event['queryTemplate']) \
             .render(event.get('templateValues', {}))
 
-    except Exception as err:
-        pass
-
-    result_set: Dict = athena.execute(query_string) \
-        .wait_for_result().get('ResultSet',{})
+    except (KeyError, TemplateError) as err:
+        logger.error('Failed to render the query template.',
+                     extra={'error': type(err).__name__,
+                            'errorDetail': str(err),
+                            'event': event})
+        raise RuntimeError('Failed to render the query template.') from err
 
-    # 2D array.
-    # First row is a list of the column headers.
-    # All the following rows are actual data rows.
-    rows: List = result_set.get('Rows', [])
+    result = _run(query_string)
 
     logger.debug('Successfully executed query.',
-                 extra={'result_set': result_set})
+                 extra={'rows_count': result['rowsCount']})
 
-    return {
-        'query': query_string,
-        'rowsCount': max(len(rows) - 1, 0),
-        'rows': [{rows[0]['Data'][index]['VarCharValue']: cell['VarCharValue']
-                  for index, cell in enumerate(row['Data'])}
-                 for row in rows[1:]]
-    }
-
-
-    result
+    return {'query': query_string, **result}
 
 
 def lambda_handler(event: Dict, context):
@@ -73,4 +116,13 @@ def lambda_handler(event: Dict, context):
     :param event:    the lambda event;
     :param context:  the lambda context;
     """
-    sqs_batch(event, context)
+    # Query results are only deduplicated within a single batch.
+    _run.cache_clear()
+
+    try:
+        return sqs_batch(event, context)
+
+    finally:
+        # Ship any buffered EventBridge entries before the execution context
+        # is frozen.
+        events.flush_events()
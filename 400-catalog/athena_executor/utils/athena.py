@@ -1,8 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 import os
+import random
 import time
 import logging
 
 import boto3
+from botocore.config import Config
 
 
 ATHENA_WORKGROUP = os.environ['ATHENA_WORKGROUP']
@@ -13,7 +16,20 @@ LOGGER_NAME = os.getenv('AWS_LAMBDA_FUNCTION_NAME', __name__)
 LOGGER = logging.getLogger(LOGGER_NAME)
 
 
-athena = boto3.client('athena')
+# Keep-alive sockets survive freeze/thaw; the pool covers the worker-thread
+# fan-out.
+athena = boto3.client('athena',
+                      config=Config(tcp_keepalive=True,
+                                    max_pool_connections=64,
+                                    retries={'max_attempts': 3,
+                                             'mode': 'adaptive'}))
+
+# Speculative get_query_results calls run here, at most one per in-flight
+# query. The pool is sized to the handlers' batch fan-out so concurrent
+# records never block behind one another's speculative calls, and outlives
+# invocations along with the rest of the execution context.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('WORKER_THREADS', 10)))
 
 
 def execute(query):
@@ -53,20 +69,51 @@ class AthenaQuery():
         self.query_id = query_id
         self.__query_timeout = query_timeout
 
-    def get_result(self):
+    def get_result(self, first_response=None):
         """
-        Return the result of the Athena query, if any.
-
-        :return: the result object of the query.
+        Yield the result pages of the Athena query, if any.
+
+        Athena caps get_query_results at 1000 rows per response; larger
+        result sets were silently truncated before. Pages are yielded as
+        they come back so callers can transform and release them one at a
+        time instead of holding the full result set.
+        :param first_response: an already-fetched first get_query_results
+                               response seeding the pagination, if any.
+        :return:               a generator of ResultSet objects, one per
+                               page.
         """
         try:
-            return athena.get_query_results(QueryExecutionId=self.query_id)
+            response = first_response or \
+                athena.get_query_results(QueryExecutionId=self.query_id)
+            yield response['ResultSet']
+
+            while token := response.get('NextToken'):
+                response = athena.get_query_results(
+                    QueryExecutionId=self.query_id, NextToken=token)
+                yield response['ResultSet']
 
         except Exception as err:
             LOGGER.exception('Failed to get Athena query result.',
                              extra={'error': err, 'query_id': self.query_id})
             raise
 
+    def __prefetch_result(self):
+        """
+        Speculatively fetch the query results, quietly.
+
+        Runs on the shared worker while the calling thread polls the query
+        status; Athena rejects the call until the query completes, in which
+        case the poll loop simply tries again.
+        :return: the result object of the query, or None if it could not be
+                 fetched (typically, the query has not finished yet).
+        """
+        try:
+            return athena.get_query_results(QueryExecutionId=self.query_id)
+
+        # pylint: disable=broad-except
+        except Exception:
+            return None
+
     def get_status(self):
         """
         Return status of the query.
@@ -111,7 +158,8 @@ class AthenaQuery():
                                          seconds. NOTE: This does not cancels
                                          the query. Query might still be
                                          running.
-        :return:                         the query results.
+        :return:                         a generator over the query result
+                                         pages.
         :raise:                          - RuntimeError when query status is
                                            failed;
                                          - TimeoutError if waiting time
@@ -121,8 +169,13 @@ class AthenaQuery():
             if query_timeout_in_seconds is None \
             else int(query_timeout_in_seconds)
 
-        __sleep = 1
+        # Poll with exponential backoff: fast queries are detected within
+        # ~100ms instead of a full second, while long-running queries settle
+        # at one get_query_execution call every 2 seconds. The jitter keeps
+        # concurrent records from polling in lockstep.
+        __sleep = 0.1
         current_time = 0
+        prefetch = None
         while current_time <= query_timeout_in_seconds:
             (status, reason, bytes_scanned, execution_ms) = self.get_status()
 
@@ -132,7 +185,8 @@ class AthenaQuery():
                                    'bytes_scanned': bytes_scanned,
                                    'execution_time_in_ms': execution_ms})
 
-                return self.get_result()
+                return self.get_result(
+                    first_response=prefetch.result() if prefetch else None)
 
             if status in ('CANCELLED', 'FAILED'):
                 LOGGER.info('Athena query failed.',
@@ -142,8 +196,22 @@ class AthenaQuery():
                                    'execution_time_in_ms': execution_ms})
                 raise RuntimeError(reason)
 
+            # Speculatively fetch the results while the next status poll and
+            # sleep run: when the query turns out to have succeeded, its
+            # results are already on their way back, saving a full Athena
+            # round-trip. Only speculate once the query is actually
+            # executing (Athena rejects the call outright while it is
+            # queued), and keep at most one fetch in flight per query,
+            # resubmitting only after the previous one came back empty.
+            if status not in ('QUEUED',) \
+                    and (prefetch is None
+                         or (prefetch.done()
+                             and prefetch.result() is None)):
+                prefetch = _executor.submit(self.__prefetch_result)
+
             current_time += __sleep
-            time.sleep(__sleep)
+            time.sleep(__sleep + random.uniform(0, __sleep * 0.1))
+            __sleep = min(__sleep * 2, 2.0)
 
         if not self.cancel():
             raise RuntimeError('Caught timeout but failed to stop query.')